@@ -6,22 +6,101 @@ Author: Mat Greten
 """
 
 import os
+import re
 import sys
 import json
+import http.client
+import gzip
 import argparse
+import asyncio
 import subprocess
+import shutil
 import signal
+import threading
 import time
-import fcntl
+import random
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from dataclasses import dataclass
 from datetime import datetime
 
+# orjson parses and produces bytes directly and is much faster; fall back to stdlib json
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(obj):
+        return json.dumps(obj).encode()
+
 # Configuration
 REPO = "CompanyCam/Company-Cam-API"
 OBSIDIAN_VAULT = "/Users/mat/git/Obsidian/CompanyCam Vault"
 REVIEW_DIR = f"{OBSIDIAN_VAULT}/Code Reviews/automated-reviews"
+REVIEW_CACHE_DIR = f"{REVIEW_DIR}/.cache"  # Hidden from Obsidian by the leading dot
+REVIEW_PATH = Path(REVIEW_DIR)
+CODE_REVIEWS_FILE = f"{OBSIDIAN_VAULT}/Code Reviews.md"  # Task list kept by github-review-monitor.sh
 LOCK_FILE = "/tmp/claude-pr-reviewer.lock"
+CACHE_DIR = Path.home() / ".cache" / "pr-notifier"
+DIFF_CACHE_FORMAT = 2  # Bumped when cached diffs are processed differently
+GITHUB_API_HOST = "api.github.com"
+GITHUB_TIMEOUT = 30  # Seconds per GitHub API request
+RATE_LIMIT_FLOOR = 50  # Below this many remaining requests, wait for the reset
+RATE_LIMIT_MAX_WAIT = 60  # Longest rate-limit wait worth taking
+REVIEW_ARCHIVE_DAYS = 30  # --archive-reviews gzips unlinked reviews older than this
+STALE_LOCK_GRACE = 10  # Seconds before a lock file without a PID is considered stale
 CLAUDE_PROCESS_TIMEOUT = 120  # 2 minutes per attempt
+CLAUDE_RETRY_BUDGET = 600  # 10 minutes across all attempts
+RETRY_MAX_DELAY = 16  # Cap on a single backoff sleep
+CLAUDE_MAX_TIMEOUT_RETRIES = 2  # A prompt that timed out tends to time out again
+# stderr of a failed claude run that marks the failure as transient
+CLAUDE_TRANSIENT_ERROR_PATTERN = re.compile(
+    r"rate.?limit|too many requests|\b429\b|overloaded|\b529\b|ECONNRESET|ETIMEDOUT|network", re.IGNORECASE
+)
+MAX_DIFF_BYTES = 256 * 1024  # Reviewable diff is truncated beyond this before prompting
+DIFF_READ_CHUNK = 64 * 1024
+MAX_PROMPT_DIFF_CHARS = 64_000  # Larger diffs are summarized before prompting
+DIFF_HEAD_LINES = 40  # Per-file hunk lines kept from the start of a summarized diff
+DIFF_TAIL_LINES = 20  # Per-file hunk lines kept from the end of a summarized diff
+DIFF_FILE_MAX_LINES = 300  # Any one file's hunks are cut to head and tail beyond this
+# Generated and binary files whose hunks are dropped while the diff streams in
+UNREVIEWABLE_FILE_PATTERN = re.compile(r"(\.lock|package-lock\.json|yarn\.lock|\.min\.js|\.(png|jpe?g|gif|pdf))$")
+FOCUSED_REVIEW_MIN_LINES = 100  # Smaller PRs get a single general review
+DEFAULT_PR_CONCURRENCY = 2  # PRs reviewed at once in a batch run, each with its own Claude calls
+
+# Resolved once so each Claude call skips both the --version probe and PATH lookup
+_CLAUDE_PATH = shutil.which("claude")
+
+# Call claude in print mode, piping the prompt through stdin so large diffs
+# never hit argv size limits (claude -p reads stdin when no prompt argument is given)
+# Limit tools to Read only for security - we just want analysis, not file changes
+CLAUDE_COMMAND = [_CLAUDE_PATH, "-p", "--allowedTools", "Read", "--model", "haiku"]
+
+# Claude process started early by prewarm_claude, consumed by call_claude_once
+_prewarmed_claude = None
+_prewarmed_claude_lock = threading.Lock()
+
+# GitHub token, set once by resolve_github_token
+_github_token = None
+
+# Idle keep-alive connections to the GitHub API, reused across requests
+_github_pool = []
+_github_pool_lock = threading.Lock()
+
+# Set from --verbose in main(); gates DEBUG output in log()
+VERBOSE = False
+
+# (epoch second, formatted stamp) of the last log line, reused within a second
+_log_timestamp = (None, "")
+
+# Cleared by --no-cache in main(); gates the Claude review cache and the already-reviewed check
+USE_REVIEW_CACHE = True
+
+# Set once REVIEW_DIR has been created so later saves skip the makedirs call
+_review_dir_created = False
 
 # Exit codes
 EXIT_SUCCESS = 0  # At least one review generated and saved
@@ -29,66 +108,495 @@ EXIT_OTHER_ERROR = 1  # Other errors (GitHub API, filesystem, etc.)
 EXIT_TOOL_UNAVAILABLE = 2  # Claude CLI completely unavailable
 EXIT_SKIPPED_SIZE = 3  # Skipped due to small PR size (below threshold)
 
+# Everything the review needs except the diff itself, in one round-trip
+PR_BUNDLE_QUERY = """
+query($owner: String!, $name: String!, $number: Int!) {
+  repository(owner: $owner, name: $name) {
+    pullRequest(number: $number) {
+      number
+      title
+      url
+      body
+      additions
+      deletions
+      headRefOid
+      author { login }
+    }
+  }
+}
+"""
+
+# Review prompt and markdown sections, filled with %-formatting
+REVIEW_PROMPT_TEMPLATE = """Please review this Pull Request:
+
+Title: %(title)s
+Author: %(author)s
+Description: %(body)s
+
+Code changes:
+%(diff)s
+
+Please provide a thorough code review covering:
+- Code quality and best practices
+- Potential bugs or issues
+- Security considerations
+- Performance implications
+- Suggestions for improvement
+
+Format your response as a detailed markdown code review."""
+
+# Larger PRs are reviewed by one focused prompt per area, run concurrently
+FOCUSED_REVIEW_PROMPT_TEMPLATE = """Please review this Pull Request, focusing only on %(focus)s:
+
+Title: %(title)s
+Author: %(author)s
+Description: %(body)s
+
+Code changes:
+%(diff)s
+
+%(instructions)s
+
+Leave other areas to other reviewers. Format your response as concise markdown review notes."""
+
+REVIEW_FOCUSES = {
+    "Security": "Look for injection, authentication and authorization gaps, unsafe handling of secrets or user data, and other security issues.",
+    "Quality": "Look for potential bugs, unhandled edge cases, error handling problems, and readability or maintainability issues.",
+    "Performance": "Look for inefficient queries (N+1s, missing indexes), unnecessary work in hot paths, memory growth, and scaling concerns.",
+    "Conventions": "Look for departures from the codebase's existing patterns, naming, test coverage, and framework best practices.",
+}
+
+FOCUSED_REVIEW_SECTION_TEMPLATE = """### %(focus)s
+
+%(review)s"""
+
+REVIEW_HEADER_TEMPLATE = """# PR #%(number)s: %(title)s
+
+## GitHub Links
+- [View PR](%(url)s)
+- [View Files](%(url)s/files)
+
+"""
+
+REVIEW_BODY_TEMPLATE = """## Code Review (Claude Haiku)
+
+%(review)s
+
+"""
+
+REVIEW_CONTEXT_TEMPLATE = """## Conversational Context for Claude
+
+<details>
+<summary>💬 Copy this code block to continue the review in a new Claude session</summary>
+
+```
+I'd like to continue reviewing PR #%(number)s: %(title)s
+Author: %(author)s
+PR URL: %(url)s
+
+PR Description:
+%(description)s
+
+Please fetch the latest diff for this PR using:
+gh pr diff %(number)s --repo %(repo)s
+
+Then continue with the code review discussion.
+```
+
+</details>
+
+"""
+
+REVIEW_FOOTER_TEMPLATE = """---
+*Automated review generated on %(generated_at)s*
+*Author: %(author)s*
+"""
+
+# Appended only to complete reviews, so partial ones are redone on the next run
+REVIEW_HEAD_SHA_TEMPLATE = """
+<!-- head_sha: %(head_sha)s -->
+"""
+
+# Reads the reviewed commit back out of a saved review's footer
+REVIEW_HEAD_SHA_PATTERN = re.compile(rb"<!-- head_sha: ([0-9a-f]+) -->")
+
+@dataclass(frozen=True)
+class PRBundle:
+    """PR fields used by the reviewer, unpacked once from the GraphQL response"""
+    __slots__ = (
+        "number", "title", "author_login", "url", "body",
+        "additions", "deletions", "head_sha",
+    )
+
+    number: int
+    title: str
+    author_login: str
+    url: str
+    body: str
+    additions: int
+    deletions: int
+    head_sha: str
+
+def emit_review_path(review_file):
+    """Write a review path to stdout for the shell script, unbuffered in one write"""
+    os.write(1, f"{review_file}\n".encode())
+
 def log(level, message):
-    """Simple logging function"""
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    print(f"[{timestamp}] [{level}] {message}")
+    """Simple logging function, writing to stderr so stdout carries only review paths.
+
+    DEBUG messages are only emitted with --verbose.
+    """
+    if level == "DEBUG" and not VERBOSE:
+        return
+    global _log_timestamp
+    now = int(time.time())
+    second, timestamp = _log_timestamp
+    if second != now:
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+        # One tuple assignment, so concurrent threads never see a torn pair
+        _log_timestamp = (now, timestamp)
+    sys.stderr.write(f"[{timestamp}] [{level}] {message}\n")
+
+def resolve_github_token():
+    """Resolve the GitHub token once for all API calls.
+
+    Uses GH_TOKEN/GITHUB_TOKEN if set, otherwise asks gh (which reads the
+    keyring). Returns True if a token was found.
+    """
+    global _github_token
+    _github_token = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
+    if _github_token:
+        return True
 
-def get_pr_diff_stats(pr_number):
-    """Get PR diff statistics using GitHub CLI"""
     try:
-        # Get the diff stats
-        result = subprocess.run([
-            "gh", "pr", "view", str(pr_number), 
-            "--repo", REPO,
-            "--json", "additions,deletions"
-        ], capture_output=True, text=True, check=True)
-        
-        stats = json.loads(result.stdout)
-        total_lines = stats.get("additions", 0) + stats.get("deletions", 0)
-        
-        log("DEBUG", f"PR #{pr_number}: {stats.get('additions', 0)} additions, {stats.get('deletions', 0)} deletions, {total_lines} total")
-        return total_lines
-        
-    except subprocess.CalledProcessError as e:
-        log("ERROR", f"Failed to get PR diff stats: {e}")
-        return 0
+        _github_token = subprocess.run(
+            ["gh", "auth", "token"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        log("ERROR", f"Could not get GitHub token from gh: {e}")
+        return False
+
+    return bool(_github_token)
+
+def acquire_github_connection():
+    """Take an idle keep-alive connection from the pool, or open a new one.
+
+    Returns:
+        tuple: (connection, reused)
+    """
+    with _github_pool_lock:
+        if _github_pool:
+            return _github_pool.pop(), True
+    return http.client.HTTPSConnection(GITHUB_API_HOST, timeout=GITHUB_TIMEOUT), False
+
+def release_github_connection(conn):
+    """Return a connection whose response was fully read to the pool"""
+    with _github_pool_lock:
+        _github_pool.append(conn)
+
+def close_github_connections():
+    """Close all pooled GitHub connections"""
+    with _github_pool_lock:
+        while _github_pool:
+            _github_pool.pop().close()
+
+def respect_rate_limit(response):
+    """Wait out the rate limit window when close to exhausting it.
+
+    Only short waits are taken; a long reset is logged and the call proceeds,
+    since GitHub will answer with an error anyway if the limit is hit.
+    """
+    remaining = response.getheader("X-RateLimit-Remaining")
+    reset = response.getheader("X-RateLimit-Reset")
+    if remaining is None or reset is None or int(remaining) >= RATE_LIMIT_FLOOR:
+        return
+
+    wait = int(reset) - time.time()
+    if wait <= 0:
+        return
+    if wait > RATE_LIMIT_MAX_WAIT:
+        log("WARN", f"GitHub rate limit low ({remaining} left), resets in {wait:.0f}s")
+        return
+    log("WARN", f"GitHub rate limit low ({remaining} left), waiting {wait:.0f}s for reset")
+    time.sleep(wait)
+
+def github_request(method, path, body=None, accept="application/vnd.github+json", max_bytes=None, cancel=None, etag=None, transform=None):
+    """Make a GitHub API request over a pooled keep-alive HTTPS connection.
+
+    Reading stops once max_bytes have been received, or as soon as the
+    optional cancel event is set; the connection is then closed instead of
+    being returned to the pool. Passing etag makes the request conditional,
+    so an unchanged resource comes back as a bodiless 304. An optional
+    transform is applied to each chunk as it arrives, and only what it
+    returns is kept and counted toward max_bytes.
+
+    Returns:
+        tuple: (status, body bytes, truncated, ETag header), or None if cancelled before sending
+    """
+    headers = {
+        "Authorization": f"Bearer {_github_token}",
+        "Accept": accept,
+        "User-Agent": "pr-notifier",
+        "X-GitHub-Api-Version": "2022-11-28",
+    }
+    if body is not None:
+        headers["Content-Type"] = "application/json"
+    if etag:
+        headers["If-None-Match"] = etag
+
+    if cancel is not None and cancel.is_set():
+        return None
 
-def get_pr_details(pr_number):
-    """Get PR details using GitHub CLI"""
+    for attempt in range(2):
+        conn, reused = acquire_github_connection()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            break
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            if reused and attempt == 0:
+                continue  # The server dropped the idle keep-alive connection
+            raise
+
+    data = bytearray()
+    truncated = False
     try:
-        result = subprocess.run([
-            "gh", "pr", "view", str(pr_number),
-            "--repo", REPO,
-            "--json", "number,title,author,url,body,reviewRequests"
-        ], capture_output=True, text=True, check=True)
-        
-        return json.loads(result.stdout)
-    except subprocess.CalledProcessError as e:
-        log("ERROR", f"Failed to get PR details: {e}")
+        while True:
+            chunk = response.read(DIFF_READ_CHUNK)
+            if not chunk:
+                break
+            data += transform(chunk) if transform is not None else chunk
+            if max_bytes is not None and len(data) >= max_bytes:
+                truncated = True
+                break
+            if cancel is not None and cancel.is_set():
+                truncated = True
+                break
+    except BaseException:
+        conn.close()
+        raise
+
+    if truncated or response.will_close:
+        conn.close()
+    else:
+        release_github_connection(conn)
+
+    respect_rate_limit(response)
+    return response.status, bytes(data), truncated, response.getheader("ETag")
+
+async def query_pull_request(query, pr_number, what):
+    """Run a GraphQL query against REPO and return its pullRequest object, or None"""
+    owner, name = REPO.split("/", 1)
+    payload = json_dumps({
+        "query": query,
+        "variables": {"owner": owner, "name": name, "number": pr_number},
+    })
+    try:
+        status, body, _, _ = await asyncio.to_thread(github_request, "POST", "/graphql", payload)
+        if status != 200:
+            log("ERROR", f"Failed to get PR {what}: GitHub returned HTTP {status}")
+            return None
+
+        response = json_loads(body)
+        if response.get("errors"):
+            log("ERROR", f"Failed to get PR {what}: {response['errors'][0].get('message')}")
+            return None
+
+        pr = response["data"]["repository"]["pullRequest"]
+        if pr is None:
+            raise KeyError("pullRequest")
+        return pr
+    except (http.client.HTTPException, OSError) as e:
+        log("ERROR", f"Failed to get PR {what}: {e}")
+        return None
+    except (KeyError, TypeError, ValueError) as e:
+        log("ERROR", f"Unexpected GraphQL response for PR #{pr_number} {what}: {e}")
         return None
 
-def get_pr_files(pr_number):
-    """Get PR file changes using GitHub CLI"""
+async def fetch_pr_bundle(pr_number):
+    """Get PR details and diff stats in a single GraphQL call.
+
+    Returns a PRBundle, or None on failure.
+    """
+    pr = await query_pull_request(PR_BUNDLE_QUERY, pr_number, "details")
+    if pr is None:
+        return None
+
+    bundle = PRBundle(
+        number=pr.get("number", pr_number),
+        title=pr.get("title") or "",
+        author_login=(pr.get("author") or {}).get("login", ""),
+        url=pr.get("url") or "",
+        body=pr.get("body") or "",
+        additions=pr.get("additions", 0),
+        deletions=pr.get("deletions", 0),
+        head_sha=pr.get("headRefOid") or "",
+    )
+
+    log("DEBUG", f"PR #{pr_number}: {bundle.additions} additions, {bundle.deletions} deletions, {bundle.additions + bundle.deletions} total")
+    return bundle
+
+class UnreviewableFileFilter:
+    """Drops the hunks of generated and binary files from a streamed diff.
+
+    feed() takes raw chunks as they arrive and returns what to keep; only
+    complete lines are examined, so a header split across chunks is fine.
+    Each dropped file keeps its diff --git line, followed by a marker
+    counting the lines omitted. Call finish() after the last chunk.
+    """
+
+    def __init__(self):
+        self.pending = b""
+        self.skipping = False
+        self.skipped_lines = 0
+        self.dropped_files = []
+
+    def feed(self, chunk):
+        data = self.pending + chunk
+        end = data.rfind(b"\n") + 1
+        self.pending = data[end:]
+        return self._filter(data[:end])
+
+    def finish(self):
+        data, self.pending = self.pending, b""
+        return self._filter(data) + self._end_file()
+
+    def _end_file(self):
+        """Marker for the file being skipped, if any, as its section ends"""
+        marker = b""
+        if self.skipping:
+            marker = f"... [{self.skipped_lines} lines of generated or binary content omitted] ...\n".encode()
+        self.skipping = False
+        self.skipped_lines = 0
+        return marker
+
+    def _filter(self, data):
+        # data always starts at a line start, so headers are found by searching for "\ndiff --git "
+        kept = []
+        pos = 0
+        while pos < len(data):
+            if data.startswith(b"diff --git ", pos):
+                kept.append(self._end_file())
+                line_end = data.find(b"\n", pos) + 1 or len(data)
+                header = data[pos:line_end]
+                path = header.rstrip(b"\n").rsplit(b" b/", 1)[-1].decode("utf-8", "replace")
+                if UNREVIEWABLE_FILE_PATTERN.search(path):
+                    self.skipping = True
+                    self.dropped_files.append(path)
+                kept.append(header)
+                pos = line_end
+                continue
+
+            next_header = data.find(b"\ndiff --git ", pos)
+            section_end = next_header + 1 if next_header != -1 else len(data)
+            if self.skipping:
+                self.skipped_lines += data.count(b"\n", pos, section_end)
+            else:
+                kept.append(data[pos:section_end])
+            pos = section_end
+        return b"".join(kept)
+
+def load_diff_cache(pr_number):
+    """Load the cached diff entry for a PR, or None if there isn't a usable one.
+
+    Entries are {"format": ..., "etag": ..., "sha": ..., "data": ...,
+    "truncated": ...}: the filtered diff text, the ETag GitHub served it
+    with, the head commit it was fetched at, and whether it hit the cap.
+    Entries from another DIFF_CACHE_FORMAT are ignored.
+    """
     try:
-        result = subprocess.run([
-            "gh", "pr", "diff", str(pr_number),
-            "--repo", REPO
-        ], capture_output=True, text=True, check=True)
-        
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        log("ERROR", f"Failed to get PR diff: {e}")
+        entry = json_loads((CACHE_DIR / f"{pr_number}.json").read_bytes())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log("WARN", f"Ignoring unreadable diff cache for PR #{pr_number}: {e}")
         return None
 
+    if not isinstance(entry, dict) or entry.get("format") != DIFF_CACHE_FORMAT:
+        return None
+    if not isinstance(entry.get("data"), str):
+        return None
+    return entry
+
+def save_diff_cache(pr_number, entry):
+    """Atomically write a PR's diff cache entry; failures only cost a refetch"""
+    cache_file = CACHE_DIR / f"{pr_number}.json"
+    temp_file = CACHE_DIR / f".{pr_number}.json.tmp"
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        temp_file.write_bytes(json_dumps(entry))
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        log("WARN", f"Could not write diff cache for PR #{pr_number}: {e}")
+
+async def get_pr_files(pr_number, cancel=None, cached=None):
+    """Get the PR's unified diff from the GitHub API, capped at MAX_DIFF_BYTES.
+
+    The response is read in chunks, generated and binary files are dropped
+    as they stream in (see UnreviewableFileFilter), and the download is
+    abandoned once the reviewable part reaches the cap instead of being
+    buffered in full. Setting the optional cancel event abandons it
+    outright. With a cached entry the request is conditional on its ETag,
+    and a 304 returns the cached diff.
+
+    Returns:
+        tuple: (diff text, ETag, truncated), or (None, None, False) on failure
+    """
+    diff_filter = UnreviewableFileFilter()
+    try:
+        result = await asyncio.to_thread(
+            github_request, "GET", f"/repos/{REPO}/pulls/{pr_number}",
+            accept="application/vnd.github.diff", max_bytes=MAX_DIFF_BYTES, cancel=cancel,
+            etag=cached and cached.get("etag"), transform=diff_filter.feed,
+        )
+    except (http.client.HTTPException, OSError) as e:
+        log("ERROR", f"Failed to get PR diff: {e}")
+        return None, None, False
+
+    if cancel is not None and cancel.is_set():
+        log("DEBUG", f"Diff download for PR #{pr_number} abandoned")
+        return None, None, False
+    status, body, truncated, etag = result
+
+    if status == 304 and cached:
+        log("DEBUG", f"PR #{pr_number} diff unchanged, using cached copy")
+        return cached["data"], cached["etag"], cached.get("truncated", False)
+
+    if status != 200:
+        log("ERROR", f"Failed to get PR diff: GitHub returned HTTP {status}")
+        return None, None, False
+
+    if truncated:
+        # Cut on a line boundary so the last hunk line isn't mangled
+        cut = body.rfind(b"\n", 0, MAX_DIFF_BYTES) + 1 or MAX_DIFF_BYTES
+        body = body[:cut]
+        last_header = body.rfind(b"\ndiff --git ") + 1
+        last_file = body[last_header:body.find(b"\n", last_header)].rsplit(b" b/", 1)[-1].decode("utf-8", "replace")
+        log("WARN", f"PR #{pr_number} diff exceeds {MAX_DIFF_BYTES // 1024} KB of reviewable changes, "
+                    f"truncating within {last_file}; files after it are not reviewed")
+    else:
+        body += diff_filter.finish()
+
+    if diff_filter.dropped_files:
+        log("DEBUG", f"Dropped generated/binary files from PR #{pr_number} diff: {', '.join(diff_filter.dropped_files)}")
+
+    diff_content = body.decode("utf-8", "replace")
+    if truncated:
+        diff_content += f"\n... [diff truncated at {MAX_DIFF_BYTES // 1024} KB] ...\n"
+    return diff_content, etag, truncated
 
 def kill_process_group(process):
     """Kill an entire process group to ensure no orphaned children"""
     if process is None:
         return
+    # start_new_session=True made the child a session leader, so its PID is
+    # the group ID. os.getpgid can't be used: it fails once the leader has
+    # been reaped, even while the rest of its group is still running. The ID
+    # can't be reused while any member of the group is alive.
+    pgid = process.pid
     try:
-        # Get the process group ID (same as PID when start_new_session=True)
-        pgid = os.getpgid(process.pid)
         log("DEBUG", f"Killing process group {pgid}")
         os.killpg(pgid, signal.SIGTERM)
         # Give processes a moment to terminate gracefully
@@ -104,139 +612,364 @@ def kill_process_group(process):
         log("WARN", f"Error killing process group: {e}")
 
 
+def start_process_group(cmd):
+    """Start a command as the leader of a new process group, with piped stdio"""
+    # start_new_session=True creates a new process group for clean termination
+    return subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        # Explicit, since launchd jobs often run with an ASCII locale and
+        # prompts carry arbitrary diff text
+        encoding="utf-8",
+        errors="replace",
+        start_new_session=True
+    )
+
+def finish_process_group(process, input=None, timeout=None):
+    """Feed input to a process from start_process_group and collect its result.
+
+    subprocess.run only kills the direct child on timeout, which would orphan
+    anything it spawned. Here the process group is killed on timeout, nonzero
+    exit, or any other error before the exception propagates.
+
+    Returns:
+        CompletedProcess: On zero exit status
+    Raises:
+        CalledProcessError, TimeoutExpired: With the process group already reaped
+    """
+    with process:
+        try:
+            stdout, stderr = process.communicate(input=input, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            log("WARN", f"{os.path.basename(process.args[0])} timed out after {timeout}s, killing process group...")
+            kill_process_group(process)
+            process.wait()  # Reap the zombie
+            raise
+        except BaseException:
+            kill_process_group(process)
+            raise
+
+    if process.returncode != 0:
+        kill_process_group(process)  # Don't leave children of a failed run behind
+        raise subprocess.CalledProcessError(process.returncode, process.args, output=stdout, stderr=stderr)
+
+    return subprocess.CompletedProcess(process.args, process.returncode, stdout, stderr)
+
+def prewarm_claude():
+    """Start a Claude process now so its startup overlaps other work.
+
+    The process sits waiting for its prompt on stdin; the next
+    call_claude_once hands it the prompt instead of spawning a fresh one.
+    """
+    global _prewarmed_claude
+    if _CLAUDE_PATH is None or _prewarmed_claude is not None:
+        return
+    try:
+        _prewarmed_claude = start_process_group(CLAUDE_COMMAND)
+        log("DEBUG", f"Prewarmed claude (PID {_prewarmed_claude.pid})")
+    except OSError as e:
+        log("WARN", f"Could not prewarm claude: {e}")
+
+def take_prewarmed_claude():
+    """Claim the prewarmed Claude process, if any (at most one caller gets it).
+
+    A process that has already exited, e.g. because the CLI gave up waiting
+    for stdin, is cleaned up and None returned instead.
+    """
+    global _prewarmed_claude
+    with _prewarmed_claude_lock:
+        process, _prewarmed_claude = _prewarmed_claude, None
+    if process is not None and process.poll() is not None:
+        log("DEBUG", f"Prewarmed claude exited early (status {process.returncode}), discarding")
+        with process:
+            kill_process_group(process)
+        return None
+    return process
+
+def discard_prewarmed_claude():
+    """Kill a prewarmed Claude process that was never used"""
+    process = take_prewarmed_claude()
+    if process is not None:
+        with process:
+            kill_process_group(process)
+
+def backoff_delay(attempt, base_delay, deadline):
+    """Decorrelated-jitter delay before the next retry.
+
+    Jitter keeps concurrent runs from retrying in lockstep against the same
+    failing endpoint. Returns None if sleeping would overrun the deadline.
+    """
+    delay = random.uniform(base_delay, min(RETRY_MAX_DELAY, base_delay * 3 * (2 ** attempt)))
+    if time.monotonic() + delay > deadline:
+        return None
+    return delay
+
+def call_claude_once(prompt):
+    """Make a single Claude Code CLI attempt.
+
+    Uses the prewarmed process if there is one; if that fails, the attempt
+    falls back to one freshly spawned process.
+
+    Returns:
+        tuple: (ok, result)
+        - (True, review text) on a non-empty response
+        - (False, exception) on failure, or (False, None) on an empty response
+    """
+    process = take_prewarmed_claude()
+    if process is not None:
+        ok, result = run_claude_process(process, prompt)
+        if ok:
+            return ok, result
+        # A failure may be down to the prewarmed process itself, so it isn't
+        # what the caller's retry decision should be based on
+        log("DEBUG", f"Prewarmed claude failed ({describe_claude_failure(result)}), using a fresh process")
+
+    try:
+        process = start_process_group(CLAUDE_COMMAND)
+    except OSError as e:
+        return False, e
+    return run_claude_process(process, prompt)
+
+def run_claude_process(process, prompt):
+    """Send the prompt to a started Claude process; returns like call_claude_once"""
+    try:
+        stdout = finish_process_group(
+            process,
+            input=prompt,
+            timeout=CLAUDE_PROCESS_TIMEOUT
+        ).stdout
+    except Exception as e:
+        # Process group already killed by finish_process_group
+        return False, e
+
+    review = stdout.strip()
+    return bool(review), review or None
+
+def describe_claude_failure(error):
+    """Human-readable reason for a failed call_claude_once attempt"""
+    if error is None:
+        return "Claude Code CLI returned empty response"
+    if isinstance(error, FileNotFoundError):
+        return "claude CLI not found"
+    if isinstance(error, subprocess.CalledProcessError):
+        return f"claude CLI failed with exit code {error.returncode}"
+    if isinstance(error, subprocess.TimeoutExpired):
+        return f"Claude Code CLI timed out after {CLAUDE_PROCESS_TIMEOUT}s"
+    return f"Error calling Claude Code CLI: {error}"
+
+def claude_retries_allowed(error, max_retries):
+    """How many retries a failed call_claude_once attempt is worth.
+
+    Transient failures (rate limits, overload, network errors) get the full
+    allowance and timeouts a couple more tries. A missing binary, other
+    nonzero exits, and unexpected errors won't fix themselves, so they fail
+    fast.
+    """
+    if error is None:
+        return 1  # Empty response
+    if isinstance(error, subprocess.TimeoutExpired):
+        return CLAUDE_MAX_TIMEOUT_RETRIES
+    if isinstance(error, subprocess.CalledProcessError):
+        if CLAUDE_TRANSIENT_ERROR_PATTERN.search(error.stderr or ""):
+            return max_retries
+        return 0
+    return 0
+
 def call_claude_code_cli(prompt, additional_context=""):
-    """Call Claude Code CLI for code review with exponential backoff retry.
+    """Call Claude Code CLI for code review with jittered exponential backoff retry.
 
-    Uses process groups to ensure proper cleanup of all child processes
-    on timeout or error.
+    The first attempt runs straight through; the retry loop is only entered
+    when it fails, and only for failures claude_retries_allowed considers
+    worth retrying. Uses process groups to ensure proper cleanup of all
+    child processes on timeout or error. Retries stop early once
+    CLAUDE_RETRY_BUDGET, counted from the first attempt, is spent.
     """
+    if _CLAUDE_PATH is None:
+        log("ERROR", "claude CLI not found on PATH")
+        return None
+
+    # Set before the first attempt so its time counts against the budget
+    deadline = time.monotonic() + CLAUDE_RETRY_BUDGET
+
+    ok, result = call_claude_once(prompt)
+    if ok:
+        log("DEBUG", "Claude Code CLI completed successfully")
+        return result
+
     max_retries = 5
     base_delay = 1  # Start with 1 second
 
-    for attempt in range(max_retries):
-        process = None
-        try:
-            # Check if claude is available
-            subprocess.run(["claude", "--version"], capture_output=True, check=True)
-
-            # Call claude directly with the prompt using -p flag
-            # Limit tools to Read only for security - we just want analysis, not file changes
-            # Use start_new_session=True to create a new process group for proper cleanup
-            process = subprocess.Popen(
-                [
-                    "claude",
-                    "-p", prompt,
-                    "--allowedTools", "Read",
-                    "--model", "haiku"
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                start_new_session=True  # Creates new process group for clean termination
-            )
+    for attempt in range(1, max_retries):
+        error_msg = describe_claude_failure(result)
+        if attempt > claude_retries_allowed(result, max_retries):
+            log("ERROR", f"{error_msg}. Not retrying.")
+            if getattr(result, "stderr", None):
+                log("ERROR", f"Final stderr: {result.stderr}")
+            return None
+        delay = backoff_delay(attempt - 1, base_delay, deadline)
+        if delay is None:
+            log("ERROR", f"{error_msg}. Retry budget of {CLAUDE_RETRY_BUDGET}s exhausted.")
+            return None
+        log("WARN", f"{error_msg}. Retrying in {delay:.1f}s (attempt {attempt}/{max_retries})...")
+        time.sleep(delay)
 
-            try:
-                stdout, stderr = process.communicate(timeout=CLAUDE_PROCESS_TIMEOUT)
-            except subprocess.TimeoutExpired:
-                log("WARN", f"Claude process timed out after {CLAUDE_PROCESS_TIMEOUT}s, killing process group...")
-                kill_process_group(process)
-                process.wait()  # Reap the zombie
-                raise
-
-            if process.returncode != 0:
-                raise subprocess.CalledProcessError(process.returncode, "claude", stderr=stderr)
-
-            if stdout.strip():
-                if attempt > 0:
-                    log("INFO", f"Claude Code CLI succeeded on attempt {attempt + 1}/{max_retries}")
-                else:
-                    log("DEBUG", "Claude Code CLI completed successfully")
-                return stdout.strip()
-            else:
-                log("WARN", f"Claude Code CLI returned empty response on attempt {attempt + 1}/{max_retries}")
-                if attempt == max_retries - 1:  # Last attempt
-                    return None
-
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
-            error_msg = "claude CLI not found" if isinstance(e, FileNotFoundError) else f"claude CLI failed with exit code {e.returncode}"
-
-            # Ensure cleanup on error
-            if process is not None:
-                kill_process_group(process)
-
-            if attempt == max_retries - 1:  # Last attempt
-                log("ERROR", f"{error_msg}. All {max_retries} retry attempts exhausted.")
-                if hasattr(e, 'stderr') and e.stderr:
-                    log("ERROR", f"Final stderr: {e.stderr}")
-                return None
-            else:
-                # Calculate exponential backoff delay: 2^attempt seconds
-                delay = base_delay * (2 ** attempt)
-                log("WARN", f"{error_msg}. Retrying in {delay}s (attempt {attempt + 1}/{max_retries})...")
-                time.sleep(delay)
+        ok, result = call_claude_once(prompt)
+        if ok:
+            log("INFO", f"Claude Code CLI succeeded on attempt {attempt + 1}/{max_retries}")
+            return result
 
-        except subprocess.TimeoutExpired:
-            # Process group already killed above, just handle retry logic
-            if attempt == max_retries - 1:  # Last attempt
-                log("ERROR", f"Claude Code CLI timed out after {CLAUDE_PROCESS_TIMEOUT}s. All {max_retries} retry attempts exhausted.")
-                return None
-            else:
-                delay = base_delay * (2 ** attempt)
-                log("WARN", f"Claude Code CLI timed out. Retrying in {delay}s (attempt {attempt + 1}/{max_retries})...")
-                time.sleep(delay)
+    log("ERROR", f"{describe_claude_failure(result)}. All {max_retries} retry attempts exhausted.")
+    if getattr(result, "stderr", None):
+        log("ERROR", f"Final stderr: {result.stderr}")
+    return None
 
-        except Exception as e:
-            # Ensure cleanup on any error
-            if process is not None:
-                kill_process_group(process)
+def call_claude_cached(prompt):
+    """Call call_claude_code_cli, memoized on disk by the prompt's SHA-256.
 
-            if attempt == max_retries - 1:  # Last attempt
-                log("ERROR", f"Error calling Claude Code CLI: {e}. All {max_retries} retry attempts exhausted.")
-                return None
-            else:
-                delay = base_delay * (2 ** attempt)
-                log("WARN", f"Error calling Claude Code CLI: {e}. Retrying in {delay}s (attempt {attempt + 1}/{max_retries})...")
-                time.sleep(delay)
+    An identical prompt (same PR text and diff) always gets the same review,
+    so re-runs and retries reuse it instead of paying for another model
+    call. Only successful reviews are cached.
+    """
+    if not USE_REVIEW_CACHE:
+        return call_claude_code_cli(prompt)
 
-    # This shouldn't be reached, but just in case
-    return None
+    key = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    cache_file = f"{REVIEW_CACHE_DIR}/{key}.md"
+    try:
+        with open(cache_file, 'rb') as f:
+            review = f.read().decode('utf-8')
+        log("DEBUG", f"Using cached review {key[:12]}")
+        return review
+    except FileNotFoundError:
+        pass
+    except (OSError, UnicodeDecodeError) as e:
+        log("WARN", f"Ignoring unreadable cached review {key[:12]}: {e}")
+
+    review = call_claude_code_cli(prompt)
+    if review:
+        # Thread id keeps concurrent writers from sharing a temp file
+        tmp_file = f"{REVIEW_CACHE_DIR}/.{key}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(REVIEW_CACHE_DIR, exist_ok=True)
+            with open(tmp_file, 'wb') as f:
+                f.write(review.encode('utf-8'))
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            log("WARN", f"Could not cache review {key[:12]}: {e}")
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
+    return review
 
-def generate_review_content(pr_details, diff_content):
-    """Generate the review content using Claude
+def call_claude_concurrently(prompts):
+    """Run independent Claude prompts in parallel.
+
+    Each prompt goes through call_claude_cached and then
+    call_claude_code_cli, so per-call timeouts, retries, and process-group
+    cleanup are unchanged. Wall time is that of the slowest prompt rather
+    than the sum.
 
     Returns:
-        tuple: (review_content, has_successful_reviews)
-        - review_content: Complete markdown content if review succeeded, None otherwise
-        - has_successful_reviews: True if review was generated successfully
+        list: Review text (or None) for each prompt, in the same order
     """
-    pr_number = pr_details.get("number")
-    title = pr_details.get("title", "")
-    author = pr_details.get("author", {}).get("login", "")
-    url = pr_details.get("url", "")
-    body = pr_details.get("body", "")
+    if len(prompts) == 1:
+        return [call_claude_cached(prompts[0])]
 
-    # Create the review prompt
-    review_prompt = f"""Please review this Pull Request:
+    with ThreadPoolExecutor(max_workers=len(prompts)) as executor:
+        return list(executor.map(call_claude_cached, prompts))
 
-Title: {title}
-Author: {author}
-Description: {body}
+def elide_lines(lines, head, tail):
+    """Keep the first head and last tail lines, marking how many were dropped"""
+    if len(lines) <= head + tail:
+        return lines
+    return lines[:head] + [f"... [{len(lines) - head - tail} lines elided] ..."] + lines[-tail:]
 
-Code changes:
-{diff_content}
+def summarize_diff(diff_content, max_chars=MAX_PROMPT_DIFF_CHARS):
+    """Trim a diff down to what is worth sending to Claude.
 
-Please provide a thorough code review covering:
-- Code quality and best practices
-- Potential bugs or issues
-- Security considerations
-- Performance implications
-- Suggestions for improvement
+    Generated and binary files were already dropped by get_pr_files. Any
+    file with more than DIFF_FILE_MAX_LINES of hunks keeps just its head
+    and tail. If that is still over max_chars, each file is
+    cut to the first DIFF_HEAD_LINES and last DIFF_TAIL_LINES lines of its
+    hunks, plus a marker counting the lines elided in between.
 
-Format your response as a detailed markdown code review."""
+    Returns:
+        tuple: (trimmed diff, changed lines it contains)
+    """
+    files = []
+    changed_lines = 0
+    for section in diff_content.split("\ndiff --git "):
+        lines = section.split("\n")
+        # File header (diff --git, index, ---, +++) runs up to the first hunk
+        hunk_start = next((i for i, line in enumerate(lines) if line.startswith("@@")), len(lines))
+        header, body = lines[:hunk_start], lines[hunk_start:]
+        # Count +/- lines with str.count over the hunk text rather than line by line
+        hunks = section[len("\n".join(header)):]
+        changed_lines += hunks.count("\n+") + hunks.count("\n-")
+        body = elide_lines(body, DIFF_FILE_MAX_LINES * 2 // 3, DIFF_FILE_MAX_LINES // 3)
+        files.append((header, body))
+    summary = "\ndiff --git ".join("\n".join(header + body) for header, body in files)
+
+    if len(summary) > max_chars:
+        summary = "\ndiff --git ".join(
+            "\n".join(header + elide_lines(body, DIFF_HEAD_LINES, DIFF_TAIL_LINES))
+            for header, body in files
+        )
+
+    if len(summary) > max_chars:
+        cut = summary.rfind("\n", 0, max_chars) + 1 or max_chars
+        summary = summary[:cut] + "... [diff truncated] ...\n"
+    return summary, changed_lines
+
+def generate_review_content(pr_details, diff_content, changed_lines):
+    """Generate the review content using Claude
+
+    changed_lines (from summarize_diff) decides between a single general
+    review and concurrent focused ones.
+
+    Returns:
+        tuple: (review_content, has_successful_reviews)
+        - review_content: Complete markdown content if review succeeded, None otherwise
+        - has_successful_reviews: True if review was generated successfully
+    """
+    pr_number = pr_details.number
+    title = pr_details.title
+    author = pr_details.author_login
+    url = pr_details.url
+    body = pr_details.body
+
+    prompt_fields = {
+        "title": title,
+        "author": author,
+        "body": body,
+        "diff": diff_content,
+    }
 
-    # Get review from Claude Code CLI
     log("INFO", f"Generating code review for PR #{pr_number}")
-    review = call_claude_code_cli(review_prompt, "")
+    if changed_lines < FOCUSED_REVIEW_MIN_LINES:
+        # Small diffs get one general pass; focused reviews would mostly overlap
+        [review] = call_claude_concurrently([REVIEW_PROMPT_TEMPLATE % prompt_fields])
+        complete = bool(review)
+    else:
+        log("DEBUG", f"Running {len(REVIEW_FOCUSES)} focused reviews concurrently")
+        prompts = [
+            FOCUSED_REVIEW_PROMPT_TEMPLATE % {**prompt_fields, "focus": focus.lower(), "instructions": instructions}
+            for focus, instructions in REVIEW_FOCUSES.items()
+        ]
+        results = call_claude_concurrently(prompts)
+        complete = all(results)
+        review = None
+        if any(results):
+            review = "\n\n".join(
+                FOCUSED_REVIEW_SECTION_TEMPLATE % {
+                    "focus": focus,
+                    "review": result or "_This part of the review could not be generated._",
+                }
+                for focus, result in zip(REVIEW_FOCUSES, results)
+            )
 
     if not review:
         log("ERROR", "Review could not be generated - Claude CLI unavailable")
@@ -244,90 +977,249 @@ Format your response as a detailed markdown code review."""
 
     log("DEBUG", "Code review generated successfully")
 
-    # Generate markdown content
-    content = f"""# PR #{pr_number}: {title}
+    fields = {
+        "number": pr_number,
+        "title": title,
+        "author": author,
+        "url": url,
+        "description": body if body else "No description provided",
+        "repo": REPO,
+        "review": review,
+        "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "head_sha": pr_details.head_sha,
+    }
+
+    # Generate markdown content section by section and join once at the end
+    parts = []
+    parts.append(REVIEW_HEADER_TEMPLATE % fields)
+    parts.append(REVIEW_BODY_TEMPLATE % fields)
+    parts.append(REVIEW_CONTEXT_TEMPLATE % fields)
+    parts.append(REVIEW_FOOTER_TEMPLATE % fields)
+    if not complete:
+        log("WARN", f"PR #{pr_number} review is incomplete; it will be regenerated on the next run")
+    elif pr_details.head_sha:
+        parts.append(REVIEW_HEAD_SHA_TEMPLATE % fields)
+
+    return "".join(parts), True
+
+def review_path(pr_number):
+    """Path of a PR's review file in the Obsidian vault"""
+    return REVIEW_PATH / f"PR-{pr_number}-review.md"
 
-## GitHub Links
-- [View PR]({url})
-- [View Files]({url}/files)
+def save_review_to_obsidian(pr_number, content):
+    """Save the review content to Obsidian vault.
 
-## Code Review (Claude Haiku)
+    Writes to a hidden temp file and renames it into place, so Obsidian never
+    sees a partially written review.
 
-{review}
+    Returns:
+        str: Path of the saved review, or None on failure
+    """
+    global _review_dir_created
 
-## Conversational Context for Claude
+    review_file = review_path(pr_number)
+    # PID-suffixed so a second invocation can't interleave writes into our temp file
+    tmp_file = REVIEW_PATH / f".PR-{pr_number}-review.md.{os.getpid()}.tmp"
+    try:
+        # Ensure the review directory exists (once per process)
+        if not _review_dir_created:
+            REVIEW_PATH.mkdir(parents=True, exist_ok=True)
+            _review_dir_created = True
+        
+        tmp_file.write_bytes(content.encode('utf-8'))
+        os.replace(tmp_file, review_file)
+        
+        log("INFO", f"Saved review to: {review_file}")
+        return str(review_file)
+        
+    except Exception as e:
+        log("ERROR", f"Failed to save review: {e}")
+        try:
+            tmp_file.unlink()
+        except OSError:
+            pass
+        return None
 
-<details>
-<summary>💬 Copy this code block to continue the review in a new Claude session</summary>
+def reviewed_head_sha(pr_number):
+    """Head commit recorded in the PR's saved review, or None if there isn't one"""
+    try:
+        with open(review_path(pr_number), 'rb') as f:
+            # The marker is in the footer; only the tail of the file is needed
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 512))
+            tail = f.read()
+    except OSError:
+        return None
 
-```
-I'd like to continue reviewing PR #{pr_number}: {title}
-Author: {author}
-PR URL: {url}
+    match = REVIEW_HEAD_SHA_PATTERN.search(tail)
+    return match.group(1).decode() if match else None
 
-PR Description:
-{body if body else "No description provided"}
+def inspect_lock():
+    """Check whether the PID recorded in LOCK_FILE belongs to a running process.
 
-Please fetch the latest diff for this PR using:
-gh pr diff {pr_number} --repo CompanyCam/Company-Cam-API
+    Returns:
+        tuple: (alive, identity) - identity is the lock file's (inode, mtime)
+        as read, or None if there is no lock file
+    """
+    try:
+        fd = os.open(LOCK_FILE, os.O_RDONLY)
+    except FileNotFoundError:
+        return False, None
+    try:
+        # fstat and read the same open file, so identity matches the PID read
+        stat = os.fstat(fd)
+        content = os.read(fd, 64)
+    finally:
+        os.close(fd)
+    identity = (stat.st_ino, stat.st_mtime_ns)
 
-Then continue with the code review discussion.
-```
+    try:
+        pid = int(content.strip())
+    except ValueError:
+        # The owner may not have written its PID yet; only call it stale once old
+        return time.time() - stat.st_mtime < STALE_LOCK_GRACE, identity
 
-</details>
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False, identity
+    except PermissionError:
+        pass  # Exists but owned by another user
+    return True, identity
 
----
-*Automated review generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*
-*Author: {author}*
-"""
+def remove_stale_lock(identity):
+    """Remove LOCK_FILE if it is still the stale lock inspect_lock saw.
 
-    return content, True
+    Two runs can both find the same dead PID. Removing the file by name
+    would let the slower one delete the faster one's fresh lock, so the
+    lock is renamed aside (atomic, only one run can move it) and checked
+    there. If it turns out to be a newer lock, it is linked back into place.
 
-def save_review_to_obsidian(pr_number, content):
-    """Save the review content to Obsidian vault"""
+    Returns:
+        bool: True if the stale lock is gone, False if a live lock replaced it
+    """
+    aside = f"{LOCK_FILE}.{os.getpid()}.stale"
     try:
-        # Ensure the review directory exists
-        os.makedirs(REVIEW_DIR, exist_ok=True)
-        
-        # Create the review file
-        review_file = f"{REVIEW_DIR}/PR-{pr_number}-review.md"
-        
-        with open(review_file, 'w') as f:
-            f.write(content)
-        
-        log("INFO", f"Saved review to: {review_file}")
-        return review_file
-        
-    except Exception as e:
-        log("ERROR", f"Failed to save review: {e}")
+        os.rename(LOCK_FILE, aside)
+    except FileNotFoundError:
+        return True  # Another run already cleared it
+
+    try:
+        stat = os.stat(aside)
+        if (stat.st_ino, stat.st_mtime_ns) == identity:
+            log("WARN", "Removing stale lock file")
+            return True
+        # Link rather than rename back, so a lock created meanwhile isn't clobbered
+        try:
+            os.link(aside, LOCK_FILE)
+        except FileExistsError:
+            pass
+        return False
+    finally:
+        os.unlink(aside)
+
+def linked_review_names():
+    """Review note names linked from open tasks in CODE_REVIEWS_FILE.
+
+    Returns:
+        set: Names like "PR-123-review", or None if the task list can't be read
+    """
+    try:
+        with open(CODE_REVIEWS_FILE, encoding='utf-8') as f:
+            return {
+                name
+                for line in f if line.lstrip().startswith("- [ ]")
+                for name in re.findall(r"\[\[(PR-\d+-review)[|\]]", line)
+            }
+    except FileNotFoundError:
+        return set()
+    except (OSError, UnicodeDecodeError) as e:
+        log("WARN", f"Could not read {CODE_REVIEWS_FILE}: {e}")
         return None
 
+def archive_old_reviews(dry_run=False):
+    """Gzip reviews older than REVIEW_ARCHIVE_DAYS to PR-<n>-review.md.gz.
+
+    Only run on request (--archive-reviews). Reviews still linked from an
+    open task in CODE_REVIEWS_FILE are left alone, since the monitor keeps
+    those tasks current and their [[PR-n-review]] links must keep working.
+
+    Returns:
+        bool: False if the reviews or the task list couldn't be read
+    """
+    linked = linked_review_names()
+    if linked is None:
+        return False  # Can't tell which reviews are still in use
+
+    cutoff = time.time() - REVIEW_ARCHIVE_DAYS * 86400
+    try:
+        with os.scandir(REVIEW_DIR) as entries:
+            old_reviews = [
+                entry.path for entry in entries
+                if entry.name.startswith("PR-") and entry.name.endswith("-review.md")
+                and entry.name[:-len(".md")] not in linked
+                and entry.stat().st_mtime < cutoff
+            ]
+    except OSError as e:
+        log("WARN", f"Could not scan reviews for archiving: {e}")
+        return False
+
+    if dry_run:
+        for review_file in old_reviews:
+            log("INFO", f"DRY RUN: Would archive {review_file}")
+        return True
+
+    archived_all = True
+    for review_file in old_reviews:
+        archive_file = f"{review_file}.gz"
+        tmp_file = f"{archive_file}.tmp"
+        try:
+            with open(review_file, 'rb') as src, gzip.open(tmp_file, 'wb', compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(tmp_file, archive_file)
+            os.unlink(review_file)
+            log("DEBUG", f"Archived old review: {archive_file}")
+        except OSError as e:
+            log("WARN", f"Failed to archive {review_file}: {e}")
+            archived_all = False
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
+    return archived_all
+
 def acquire_lock():
     """Acquire an exclusive lock to prevent concurrent runs.
 
-    Returns the lock file handle if successful, None if another instance is running.
+    The lock is a file created atomically with O_EXCL that holds the owner's
+    PID. A lock left behind by a process that no longer exists is removed
+    (see remove_stale_lock) and acquisition retried once.
+
+    Returns the lock file descriptor if successful, None if another instance is running.
     """
-    try:
-        lock_fd = open(LOCK_FILE, 'w')
-        fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
-        # Write PID for debugging
-        lock_fd.write(str(os.getpid()))
-        lock_fd.flush()
+    for _ in range(2):
+        try:
+            lock_fd = os.open(LOCK_FILE, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            alive, identity = inspect_lock()
+            if alive or (identity is not None and not remove_stale_lock(identity)):
+                break
+            continue
+
+        # Write PID so other instances can detect a stale lock
+        os.write(lock_fd, str(os.getpid()).encode())
         log("DEBUG", f"Acquired lock (PID {os.getpid()})")
         return lock_fd
-    except (IOError, OSError) as e:
-        if e.errno in (11, 35):  # EAGAIN or EWOULDBLOCK
-            log("WARN", "Another instance is already running, exiting")
-            return None
-        raise
+
+    log("WARN", "Another instance is already running, exiting")
+    return None
 
 
 def release_lock(lock_fd):
     """Release the exclusive lock"""
-    if lock_fd:
+    if lock_fd is not None:
         try:
-            fcntl.flock(lock_fd, fcntl.LOCK_UN)
-            lock_fd.close()
+            os.close(lock_fd)
             os.unlink(LOCK_FILE)
             log("DEBUG", "Released lock")
         except Exception as e:
@@ -336,14 +1228,29 @@ def release_lock(lock_fd):
 
 def main():
     parser = argparse.ArgumentParser(description="Generate automated code reviews for GitHub PRs")
-    parser.add_argument("pr_number", type=int, help="GitHub PR number")
+    parser.add_argument("pr_numbers", type=int, nargs="*", metavar="pr_number", help="GitHub PR number(s)")
     parser.add_argument("--dry-run", action="store_true", help="Show what would be done without making changes")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
+    parser.add_argument("--no-cache", action="store_true", help="Regenerate the review even if the current commit was already reviewed or cached")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_PR_CONCURRENCY,
+                        help=f"PRs reviewed at once when several are given (default: {DEFAULT_PR_CONCURRENCY})")
+    parser.add_argument("--archive-reviews", action="store_true",
+                        help=f"Gzip reviews older than {REVIEW_ARCHIVE_DAYS} days that no open task links to")
 
     args = parser.parse_args()
+    if not args.pr_numbers and not args.archive_reviews:
+        parser.error("at least one pr_number is required")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    # Reviewing a PR twice at once would race on its cache and temp files
+    args.pr_numbers = list(dict.fromkeys(args.pr_numbers))
 
-    if args.verbose:
-        log("DEBUG", f"Starting review for PR #{args.pr_number}")
+    global VERBOSE, USE_REVIEW_CACHE
+    VERBOSE = args.verbose
+    USE_REVIEW_CACHE = not args.no_cache
+
+    if args.verbose and args.pr_numbers:
+        log("DEBUG", f"Starting review for PR {', '.join(f'#{n}' for n in args.pr_numbers)}")
 
     # Acquire lock to prevent concurrent runs
     lock_fd = acquire_lock()
@@ -351,54 +1258,147 @@ def main():
         return EXIT_OTHER_ERROR  # Another instance running
 
     try:
-        return _main_impl(args)
+        if args.archive_reviews:
+            archived = archive_old_reviews(dry_run=args.dry_run)
+            if not args.pr_numbers:
+                return EXIT_SUCCESS if archived else EXIT_OTHER_ERROR
+        return asyncio.run(_main_impl(args))
     finally:
+        discard_prewarmed_claude()
+        close_github_connections()
         release_lock(lock_fd)
 
 
-def _main_impl(args):
+def combine_exit_codes(codes):
+    """Collapse per-PR exit codes into one for a batch run.
+
+    Success if any review was saved, skipped only if every PR was skipped,
+    and otherwise the tool-unavailable code ahead of other errors.
+    """
+    if EXIT_SUCCESS in codes:
+        return EXIT_SUCCESS
+    if all(code == EXIT_SKIPPED_SIZE for code in codes):
+        return EXIT_SKIPPED_SIZE
+    if EXIT_TOOL_UNAVAILABLE in codes:
+        return EXIT_TOOL_UNAVAILABLE
+    return EXIT_OTHER_ERROR
+
+async def _main_impl(args):
     """Main implementation, called after lock is acquired"""
+    # Fail fast before any network work if there's no claude to review with
+    if _CLAUDE_PATH is None and not args.dry_run:
+        log("ERROR", "claude CLI not found on PATH - no automated review possible")
+        return EXIT_TOOL_UNAVAILABLE
+
+    if not resolve_github_token():
+        log("ERROR", "No GitHub token available (run 'gh auth login' or set GH_TOKEN)")
+        return EXIT_OTHER_ERROR
+
+    if len(args.pr_numbers) == 1:
+        return await review_pr(args.pr_numbers[0], args)
+
+    # PRs share the GitHub connection pool and prewarmed claude; the
+    # semaphore bounds how many run their Claude reviews at once
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def review_pr_bounded(pr_number):
+        async with semaphore:
+            return await review_pr(pr_number, args)
+
+    codes = await asyncio.gather(*(review_pr_bounded(n) for n in args.pr_numbers))
+    return combine_exit_codes(codes)
+
+async def review_pr(pr_number, args):
+    """Fetch, review, and save a single PR, returning its exit code"""
     if args.verbose:
-        log("DEBUG", f"Processing review for PR #{args.pr_number}")
-    
-    # Get PR details
-    pr_details = get_pr_details(args.pr_number)
+        log("DEBUG", f"Processing review for PR #{pr_number}")
+
+    # Start the diff download alongside the details query, but abandon it
+    # as soon as the details show the PR is below the size threshold or
+    # that the cached diff is still current
+    cached_diff = load_diff_cache(pr_number)
+    diff_cancel = threading.Event()
+    diff_task = asyncio.ensure_future(
+        get_pr_files(pr_number, cancel=diff_cancel, cached=cached_diff)
+    )
+
+    pr_details = await fetch_pr_bundle(pr_number)
     if not pr_details:
-        log("ERROR", f"Could not retrieve PR #{args.pr_number}")
+        diff_cancel.set()
+        log("ERROR", f"Could not retrieve PR #{pr_number}")
         return 1
-    
+
     # Check line count threshold
-    line_count = get_pr_diff_stats(args.pr_number)
+    line_count = pr_details.additions + pr_details.deletions
     if line_count < 10:
-        log("INFO", f"Skipping review for PR #{args.pr_number} ({line_count} lines - below threshold)")
+        diff_cancel.set()
+        log("INFO", f"Skipping review for PR #{pr_number} ({line_count} lines - below threshold)")
         return EXIT_SKIPPED_SIZE
 
-    # Get PR diff
-    diff_content = get_pr_files(args.pr_number)
+    # Nothing to do if the saved review already covers the current head commit
+    if USE_REVIEW_CACHE and pr_details.head_sha and reviewed_head_sha(pr_number) == pr_details.head_sha:
+        diff_cancel.set()
+        review_file = str(review_path(pr_number))
+        log("INFO", f"PR #{pr_number} already reviewed at {pr_details.head_sha[:7]}: {review_file}")
+        if not args.dry_run:
+            # Same output as a fresh review, so the shell script still links it
+            emit_review_path(review_file)
+        return EXIT_SUCCESS
+
+    # This PR will be reviewed; start claude booting so its startup
+    # overlaps the rest of the diff download
+    if not args.dry_run:
+        prewarm_claude()
+
+    # A diff is immutable for a given head commit
+    if cached_diff and pr_details.head_sha and cached_diff.get("sha") == pr_details.head_sha:
+        diff_cancel.set()
+        log("DEBUG", f"Using cached diff for PR #{pr_number} at {pr_details.head_sha[:7]}")
+        diff_content = cached_diff["data"]
+        truncated = cached_diff.get("truncated", False)
+    else:
+        diff_content, etag, truncated = await diff_task
+        if diff_content and etag and pr_details.head_sha:
+            save_diff_cache(pr_number, {
+                "format": DIFF_CACHE_FORMAT, "etag": etag, "sha": pr_details.head_sha, "data": diff_content,
+                "truncated": truncated,
+            })
+
     if not diff_content:
-        log("ERROR", f"Could not retrieve diff for PR #{args.pr_number}")
+        log("ERROR", f"Could not retrieve diff for PR #{pr_number}")
         return 1
 
+    # Trim the diff once; rebinding lets the full diff be freed
+    diff_content, changed_lines = summarize_diff(diff_content)
+
+    # Lockfile and asset churn counts toward the GitHub stats but not here.
+    # A truncated diff shows only part of the PR, so it can't prove the PR small.
+    if not truncated and changed_lines < 10:
+        log("INFO", f"Skipping review for PR #{pr_number} ({changed_lines} reviewable lines - below threshold)")
+        return EXIT_SKIPPED_SIZE
+
     if args.dry_run:
-        log("INFO", f"DRY RUN: Would generate review for PR #{args.pr_number}")
-        log("INFO", f"DRY RUN: PR has {line_count} lines of changes")
+        log("INFO", f"DRY RUN: Would generate review for PR #{pr_number}")
+        log("INFO", f"DRY RUN: PR has {line_count} lines of changes, {changed_lines} reviewable")
         return 0
 
-    # Generate review content
-    log("INFO", f"Generating code review for PR #{args.pr_number}")
-    review_content, has_successful_reviews = generate_review_content(pr_details, diff_content)
+    # Generate review content off the event loop so other PRs keep moving
+    log("INFO", f"Generating code review for PR #{pr_number}")
+    review_content, has_successful_reviews = await asyncio.to_thread(
+        generate_review_content, pr_details, diff_content, changed_lines
+    )
     
     # If no successful reviews were generated, exit with tool unavailable code
     if not has_successful_reviews:
-        log("ERROR", "No automated reviews could be generated - exiting without creating files")
+        log("ERROR", f"No automated reviews could be generated for PR #{pr_number} - not creating files")
         return EXIT_TOOL_UNAVAILABLE
     
     # Save to Obsidian
-    review_file = save_review_to_obsidian(args.pr_number, review_content)
+    review_file = save_review_to_obsidian(pr_number, review_content)
     if review_file:
         log("INFO", f"Review completed and saved: {review_file}")
         # Output the file path for the shell script to use (backward compatibility)
-        print(review_file)
+        emit_review_path(review_file)
         return EXIT_SUCCESS
     else:
         log("ERROR", "Failed to save review")
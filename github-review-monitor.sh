@@ -55,6 +55,8 @@ readonly NTFY_TOPIC="${NTFY_TOPIC:-code-reviews}"
 
 # Parse team members from comma-separated string
 IFS=',' read -ra INTEGRATION_TEAM_MEMBERS <<< "${TEAM_MEMBERS:-}"
+# Same list as one string for single-pattern membership checks
+readonly INTEGRATION_TEAM_MEMBERS_CSV="${TEAM_MEMBERS:-}"
 
 # Parse Riftwalkers team members from comma-separated string
 IFS=',' read -ra RIFTWALKERS_TEAM_MEMBERS <<< "${RIFTWALKERS_TEAM_MEMBERS:-}"
@@ -64,6 +66,9 @@ readonly INTEGRATION_TEAM_SLUG="${INTEGRATION_TEAM_SLUG:-}"
 readonly RIFTWALKERS_TEAM_SLUG="${RIFTWALKERS_TEAM_SLUG:-}"
 readonly BACKEND_TEAM_SLUG="${BACKEND_TEAM_SLUG:-}"
 
+# PR titles matching this are integration reviews
+readonly INTEGRATION_TITLE_REGEX='INT-|[Ii]ntegration'
+
 # Advanced settings with defaults
 readonly PR_SIZE_THRESHOLD="${PR_SIZE_THRESHOLD:-10}"
 readonly MAX_GENERAL_REVIEWS="${MAX_GENERAL_REVIEWS:-10}"
@@ -415,35 +420,23 @@ get_integration_reviews() {
         url=$(echo "$pr" | jq -r '.url' 2>/dev/null || continue)
         updated=$(echo "$pr" | jq -r '.updatedAt' 2>/dev/null || continue)
         
-        # Check integration criteria
+        # Check integration criteria, cheapest first so jq only runs when needed
         local is_integration=false
         
-        # Check for team review request (if integration team slug is configured)
-        if [[ -n "$INTEGRATION_TEAM_SLUG" ]]; then
-            if echo "$pr" | jq -e --arg slug "$INTEGRATION_TEAM_SLUG" '.reviewRequests[]? | select(.__typename == "Team" and .slug == $slug)' >/dev/null 2>&1; then
-                is_integration=true
-            fi
-        fi
-        
-        # Check for INT- in title
-        if [[ "$title" =~ INT- ]]; then
+        # Check for INT- or "Integration" in title
+        if [[ "$title" =~ $INTEGRATION_TITLE_REGEX ]]; then
             is_integration=true
-        fi
-        
-        # Check for "Integration" in title
-        if [[ "$title" =~ [Ii]ntegration ]]; then
-            is_integration=true
-        fi
-        
-        # Check if author is integration team member
-        local author_login
-        author_login=$(echo "$pr" | jq -r '.author.login' 2>/dev/null || echo "")
-        for member in "${INTEGRATION_TEAM_MEMBERS[@]}"; do
-            if [[ "$author_login" == "$member" ]]; then
+        else
+            # Check if author is integration team member
+            local author_login
+            author_login=$(echo "$pr" | jq -r '.author.login' 2>/dev/null || echo "")
+            if [[ -n "$author_login" && ",$INTEGRATION_TEAM_MEMBERS_CSV," == *",$author_login,"* ]]; then
+                is_integration=true
+            # Check for team review request (if integration team slug is configured)
+            elif [[ -n "$INTEGRATION_TEAM_SLUG" ]] && echo "$pr" | jq -e --arg slug "$INTEGRATION_TEAM_SLUG" '.reviewRequests[]? | select(.__typename == "Team" and .slug == $slug)' >/dev/null 2>&1; then
                 is_integration=true
-                break
             fi
-        done
+        fi
         
         # Add to results if it matches integration criteria
         if [[ "$is_integration" == "true" ]]; then